@@ -6,12 +6,12 @@ setup(
     packages=find_packages(),
     install_requires=["sphinx>=4.0.0", "sphinx-rtd-theme>=1.0.0"],
     extras_require={
+        "vyper": ["vyper>=0.4.0; python_version >= '3.10'"],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
             "black>=22.0.0",
             "isort>=5.0.0",
-            "requests>=2.0.0",  # For testing server
         ]
     },
     entry_points={
@@ -1,9 +1,10 @@
 """Command-line interface for Vyper Sphinx documentation generator."""
 
 import argparse
-import subprocess
 from pathlib import Path
 
+from sphinx.cmd.build import build_main
+
 from .generator import SphinxGenerator
 from .parser import VyperParser
 from .server import serve_docs
@@ -31,8 +32,19 @@ def main() -> None:
         default=8000,
         help="Port for the documentation server",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        default="auto",
+        help="Number of parallel jobs for sphinx-build (default: auto)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Reparse every contract instead of reusing cached results",
+    )
     args = parser.parse_args()
-    _main(args.contracts_dir, args.output)
+    _main(args.contracts_dir, args.output, jobs=args.jobs, use_cache=not args.no_cache)
 
     # Serve documentation if requested
     if args.serve:
@@ -40,9 +52,12 @@ def main() -> None:
         serve_docs(build_dir, port=args.port)
 
 
-def _main(contracts_dir: str, output_dir: str) -> None:
+def _main(
+    contracts_dir: str, output_dir: str, jobs: str = "auto", use_cache: bool = True
+) -> None:
     # Parse contracts
-    vyper_parser = VyperParser(Path(contracts_dir))
+    cache_dir = Path(output_dir) / "docs" / ".cache" if use_cache else None
+    vyper_parser = VyperParser(Path(contracts_dir), cache_dir=cache_dir)
     contracts = vyper_parser.parse_contracts()
 
     # Generate Sphinx documentation
@@ -52,8 +67,10 @@ def _main(contracts_dir: str, output_dir: str) -> None:
     # Build HTML documentation
     docs_dir = Path(output_dir) / "docs"
     build_dir = docs_dir / "_build" / "html"
-    subprocess.run(
-        ["sphinx-build", "-b", "html", str(docs_dir), str(build_dir), "-v"], check=True
-    )
+    # Build in-process rather than paying for a second interpreter start-up
+    argv = ["-b", "html", str(docs_dir), str(build_dir), "-v", "-j", str(jobs)]
+    returncode = build_main(argv)
+    if returncode:
+        raise SystemExit(returncode)
 
     print(f"Documentation built successfully in {build_dir}")
@@ -1,10 +1,15 @@
 """Sphinx documentation generator for Vyper contracts."""
 
 import os
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, TextIO
 
 from .parser import Contract, Function, Struct
 
+# Contract docs are written piecemeal, so buffer a few FS blocks between syscalls
+RST_BUFFER_SIZE = 1 << 16
+MAX_WRITE_WORKERS = 32
+
 INDEX_RST = """Vyper Smart Contracts Documentation
 ================================
 
@@ -14,6 +19,12 @@ INDEX_RST = """Vyper Smart Contracts Documentation
 
 """
 
+# Shared underlines for contract titles, so each page doesn't build its own
+TITLE_UNDERLINES = {n: "=" * n for n in range(1, 128)}
+
+STRUCTS_SECTION = "Structs\n-------\n\n"
+FUNCTIONS_SECTION = "Functions\n---------\n\n"
+
 
 CONF_CONTENT = """# Configuration file for Sphinx documentation
 
@@ -32,6 +43,9 @@ exclude_patterns = ['_build', 'Thumbs.db', '.DS_Store']
 
 html_theme = 'sphinx_rtd_theme'
 html_static_path = ['_static']
+
+# Sphinx tracks parallel safety per extension module, not per conf.py: any
+# extension added above must declare itself parallel safe for `sphinx-build -j`
 """
 
 
@@ -41,67 +55,84 @@ class SphinxGenerator:
     def __init__(self, output_dir: str):
         self.output_dir = output_dir
         self.docs_dir = os.path.join(output_dir, "docs")
+        # Joining with "" adds the trailing separator, so per-file paths are plain f-strings
+        self._docs_dir_prefix = os.path.join(self.docs_dir, "")
         os.makedirs(self.docs_dir, exist_ok=True)
 
     def generate(self, contracts: List[Contract]) -> None:
         """Generate Sphinx documentation."""
+        # Contracts with nothing to document would only add empty pages for Sphinx to read
+        contracts = [c for c in contracts if c.docstring or c.structs or c.functions]
         self._generate_conf_py()
         self._generate_index_rst(contracts)
         self._generate_contract_docs(contracts)
 
     def _generate_conf_py(self) -> None:
         """Generate Sphinx configuration file."""
-        with open(os.path.join(self.docs_dir, "conf.py"), "w", encoding="utf-8") as f:
+        with open(f"{self._docs_dir_prefix}conf.py", "w", encoding="utf-8") as f:
             f.write(CONF_CONTENT)
 
     def _generate_index_rst(self, contracts: List[Contract]) -> None:
         """Generate index.rst file."""
-        content = INDEX_RST
+        parts = [INDEX_RST]
         for contract in contracts:
-            content += f"   {contract.name}\n"
+            parts.append(f"   {contract.name}\n")
 
-        with open(os.path.join(self.docs_dir, "index.rst"), "w", encoding="utf-8") as f:
-            f.write(content)
+        with open(f"{self._docs_dir_prefix}index.rst", "w", encoding="utf-8") as f:
+            f.write("".join(parts))
 
     def _generate_contract_docs(self, contracts: List[Contract]) -> None:
         """Generate documentation for each contract."""
-        for contract in contracts:
-            content = f"{contract.name}\n{'=' * len(contract.name)}\n\n"
+        if not contracts:
+            return
+
+        # Same-named contracts from different dirs share an .rst. Only the last
+        # one's page survives, as with sequential writes, and two threads never
+        # write the same file
+        pages = {contract.name: contract for contract in contracts}
+
+        # Each remaining contract gets its own file, so the writes can overlap freely
+        max_workers = min(MAX_WRITE_WORKERS, len(pages))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self._generate_single_contract_docs, pages.values()))
+
+    def _generate_single_contract_docs(self, contract: Contract) -> None:
+        """Generate documentation for a single contract."""
+        with open(
+            f"{self._docs_dir_prefix}{contract.name}.rst",
+            "w",
+            encoding="utf-8",
+            buffering=RST_BUFFER_SIZE,
+        ) as f:
+            name_length = len(contract.name)
+            underline = TITLE_UNDERLINES.get(name_length) or "=" * name_length
+            f.write(f"{contract.name}\n{underline}\n\n")
 
             if contract.docstring:
-                content += f"{contract.docstring}\n\n"
+                f.write(f"{contract.docstring}\n\n")
 
             if contract.structs:
-                content += "Structs\n---------\n\n"
+                f.write(STRUCTS_SECTION)
                 for struct in contract.structs:
-                    content += self._generate_struct_docs(struct)
+                    self._generate_struct_docs(f, struct)
 
             if contract.functions:
-                content += "Functions\n---------\n\n"
+                f.write(FUNCTIONS_SECTION)
                 for func in contract.functions:
-                    content += self._generate_function_docs(func)
-
-            with open(
-                os.path.join(self.docs_dir, f"{contract.name}.rst"),
-                "w",
-                encoding="utf-8",
-            ) as f:
-                f.write(content)
+                    self._generate_function_docs(f, func)
 
     @staticmethod
-    def _generate_function_docs(func: Function) -> str:
+    def _generate_function_docs(f: TextIO, func: Function) -> None:
         params = ", ".join(f"{p.name}: {p.type}" for p in func.params)
         return_type = f" -> {func.return_type}" if func.return_type else ""
 
-        content = f".. py:function:: {func.name}({params}){return_type}\n\n"
+        f.write(f".. py:function:: {func.name}({params}){return_type}\n\n")
         if func.docstring:
-            content += f"   {func.docstring}\n\n"
-        return content
+            f.write(f"   {func.docstring}\n\n")
 
     @staticmethod
-    def _generate_struct_docs(struct: Struct) -> str:
-        content = f".. py:class:: {func.name}\n\n"
+    def _generate_struct_docs(f: TextIO, struct: Struct) -> None:
+        f.write(f".. py:class:: {struct.name}\n\n")
         for field in struct.fields:
-            content += f"   .. py:attribute:: {struct.name}.{field.name}\n\n"
-            content += f"      {field.type}"
-        return content
+            f.write(f"   .. py:attribute:: {struct.name}.{field.name}\n\n")
+            f.write(f"      {field.type}\n\n")
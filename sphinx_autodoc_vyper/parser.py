@@ -1,85 +1,181 @@
 """Parser for Vyper smart contracts."""
 
+import hashlib
+import json
 import logging
+import mmap
 import os
 import re
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Any, List, Optional, Union
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from importlib.util import find_spec
+from sys import intern
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, Set, Union
 
 logger = logging.getLogger(__name__)
 
-valid_ints = {f"int{8 * (i+1)}" for i in range(32)}
-valid_uints = {f"uint{8 * (i+1)}" for i in range(32)}
-VALID_VYPER_TYPES = {*valid_ints, *valid_uints, "address", "bool", "Bytes", "String"}
+# vyper is slow to import and warm rebuilds never reach the parser, so only
+# check it's installed here; _import_vyper loads it on first use, and clears
+# this if the installed vyper turns out not to import
+use_vyper_ast = find_spec("vyper") is not None
+
+# fmt: off
+valid_ints = frozenset(
+    (
+        "int8", "int16", "int24", "int32", "int40", "int48", "int56", "int64",
+        "int72", "int80", "int88", "int96", "int104", "int112", "int120", "int128",
+        "int136", "int144", "int152", "int160", "int168", "int176", "int184", "int192",
+        "int200", "int208", "int216", "int224", "int232", "int240", "int248", "int256",
+    )
+)
+valid_uints = frozenset(
+    (
+        "uint8", "uint16", "uint24", "uint32", "uint40", "uint48", "uint56", "uint64",
+        "uint72", "uint80", "uint88", "uint96", "uint104", "uint112", "uint120", "uint128",
+        "uint136", "uint144", "uint152", "uint160", "uint168", "uint176", "uint184", "uint192",
+        "uint200", "uint208", "uint216", "uint224", "uint232", "uint240", "uint248", "uint256",
+    )
+)
+# fmt: on
+VALID_VYPER_TYPES = (
+    valid_ints | valid_uints | frozenset(("address", "bool", "Bytes", "String"))
+)
+
+MAX_PARSE_CHUNKSIZE = 8
+# Bump whenever a change to parsing or the models would make cached contracts stale
+CACHE_VERSION = 5
+# Cache entries nobody has read for this long belong to edited or deleted sources
+CACHE_MAX_AGE = 30 * 24 * 60 * 60
+# Below this many contracts, spawning workers costs more than the parsing itself
+MIN_PARALLEL_CONTRACTS = 4
+
+# Definitions are matched on the raw source bytes; only the captured groups get decoded
+# A struct's fields are the indented lines below its header, blank lines included.
+# Field lines keep any \r, which the param pattern skips like other whitespace
+STRUCT_REGEX = rb"^struct\s+(?P<struct_name>\w+)\s*:[ \t]*\r?\n(?P<struct_fields>(?:[ \t]+[^\n]*(?:\n|\Z)|\r?\n(?=[ \t]+\S))+)"
+# Top-level defs only (interface methods are indented); undecorated ones are internal
+FUNCTION_REGEX = rb'^(?P<decorators>(?:@[^\n]*\n)*)def\s+(?P<function_name>\w+)\s*\((?P<params>[^)]*)\)(?:\s*->\s*(?P<return_type>[^:]*[^:\s]))?\s*:\s*(?:"""\s*(?P<function_docstring>[\s\S]*?)\s*""")?'
+# One alternation scans each contract once; `lastgroup` names the matched construct
+DEFINITION_PATTERN = re.compile(
+    b"(?P<struct>" + STRUCT_REGEX + b")|(?P<function>" + FUNCTION_REGEX + b")",
+    re.MULTILINE,
+)
+DECORATOR_PATTERN = re.compile(rb"@(\w+)")
+# The contract docstring can only be preceded by comments (e.g. the version pragma).
+# Comments run up to their newline so a line of `#`s can only be split one way;
+# otherwise a long banner backtracks exponentially
+CONTRACT_DOCSTRING_PATTERN = re.compile(
+    rb'(?:\s|#[^\n]*\n)*"""\s*(?P<docstring_body>[\s\S]*?)\s*"""'
+)
+# vyper refuses sources pinned to another compiler version, but documenting them only
+# needs the syntax; the pragma is blanked out in place so source offsets don't move
+VERSION_PRAGMA_PATTERN = re.compile(
+    r"^([ \t]*#[ \t]*)(@version|pragma version)\b", re.MULTILINE
+)
+# Like the regex backend, sized types are documented by their base type
+SIZED_TYPES = frozenset(("Bytes", "String"))
+DYN_ARRAY_PATTERN = re.compile(r"DynArray\[\s*(\w+)\s*,\s*(\w+)\s*\]")
+# Match params individually so commas within brackets don't split them;
+# `lastgroup` says which kind of type was matched
+# Comments in struct bodies and multi-line signatures, e.g. `# note: ...`, would
+# otherwise read as params
+COMMENT_PATTERN = re.compile(r"#[^\n]*")
+PARAM_PATTERN = re.compile(
+    r"(?P<name>\w+)\s*:\s*(?:"
+    r"(?P<dyn_array>DynArray\[\s*(?P<dyn_type>\w+)\s*,\s*(?P<dyn_length>\w+)\s*\])"
+    r"|\((?P<tuple>[^)]+)\)"
+    r"|(?P<simple>\w+))"
+)
 
 
 @dataclass
 class Constant:
+    __slots__ = ("name", "type", "value")
 
     name: str
     type: str
     value: Any
 
-    def __post_init__(self) -> None:
-        if self.type is not None and self.type not in VALID_VYPER_TYPES:
-            logger.warning(f"{self} is not a valid Vyper type")
-
 
 @dataclass
 class Tuple:
+    __slots__ = ("types",)
+
     types: List[str]
 
     def __post_init__(self) -> None:
         # strip whitespace
-        self.types = [type_str.strip() for type_str in self.types]
+        self.types = [intern(type_str.strip()) for type_str in self.types]
 
-        # validate types
-        for type in self.types:
-            if type not in VALID_VYPER_TYPES:
-                logger.warning(f"{self} is not a valid Vyper type")
+    def __len__(self) -> int:
+        return len(self.types)
 
 
 @dataclass
 class DynArray:
     """Dynamic length array representation."""
 
+    __slots__ = ("type", "max_length")
+
     type: str
     max_length: Union[int, Constant]
 
-    def __post_init__(self) -> None:
-        if self.type not in VALID_VYPER_TYPES:
-            logger.warning(f"{self} is not a valid Vyper type")
+
+def _make_dyn_array(type: str, max_length: str) -> DynArray:
+    """Build a DynArray from its element type and max length source strings."""
+    try:
+        return DynArray(intern(type), int(max_length))
+    except ValueError:
+        # TODO: include type and value info
+        constant = Constant(name=max_length, type=None, value=None)  # type: ignore [arg-type]
+        return DynArray(intern(type), constant)
 
 
 Type = Union[str, Tuple, DynArray]
+Source = Union[bytes, mmap.mmap]
+StrPath = Union[str, "os.PathLike[str]"]
 
 
 @dataclass
 class Parameter:
     """Function parameter representation."""
 
+    __slots__ = ("name", "type")
+
     name: str
     type: Type
 
     def __post_init__(self) -> None:
-        if self.type.startswith("DynArray"):  # type: ignore [union-attr]
-            assert self.type.endswith("]")  # type: ignore [union-attr]
-            type, max_length = self.type[:-1].split("[")[1].split(",")  # type: ignore [index]
-            try:
-                self.type = DynArray(type, int(max_length))
-            except ValueError:
-                # TODO: include type and value info
-                constant = Constant(name=max_length.strip(), type=None, value=None)  # type: ignore [arg-type]
-                self.type = DynArray(type, constant)
-        elif self.type not in VALID_VYPER_TYPES:
-            logger.warning(f"{self} is not a valid Vyper type")
+        type_str = self.type
+        # Already-built DynArray/Tuple types need no work
+        if type(type_str) is not str:
+            return
+        if type_str in VALID_VYPER_TYPES:
+            # The common case, so don't bother with the prefix checks
+            self.type = intern(type_str)
+            return
+        match = (
+            DYN_ARRAY_PATTERN.fullmatch(type_str)
+            if type_str.startswith("DynArray")
+            else None
+        )
+        if match is not None:
+            self.type = _make_dyn_array(*match.groups())
+        elif type_str[:1] == "(":
+            self.type = Tuple(type_str[1:-1].split(","))
+        else:
+            self.type = intern(type_str)
 
 
 @dataclass
 class Struct:
     """Vyper struct representation."""
 
+    __slots__ = ("name", "fields")
+
     name: str
     fields: List[Parameter]
 
@@ -88,23 +184,27 @@ class Struct:
 class Function:
     """Vyper function representation."""
 
+    __slots__ = ("name", "params", "return_type", "docstring")
+
     name: str
     params: List[Parameter]
     return_type: Optional[Type]
     docstring: Optional[str]
 
     def __post_init__(self) -> None:
-        if self.return_type is not None:
-            if self.return_type.startswith("("):  # type: ignore [union-attr]
-                self.return_type = Tuple(self.return_type[1:-1].split(","))  # type: ignore [index]
-            elif self.return_type not in VALID_VYPER_TYPES:
-                logger.warning(f"{self} does not return a valid Vyper type")
+        if type(self.return_type) is str:
+            if self.return_type[:1] == "(":
+                self.return_type = Tuple(self.return_type[1:-1].split(","))
+            else:
+                self.return_type = intern(self.return_type)
 
 
 @dataclass
 class Contract:
     """Vyper contract representation."""
 
+    __slots__ = ("name", "path", "docstring", "structs", "functions")
+
     name: str
     path: str
     docstring: Optional[str]
@@ -115,95 +215,235 @@ class Contract:
 class VyperParser:
     """Parser for Vyper smart contracts."""
 
-    def __init__(self, contracts_dir: Path):
-        if not contracts_dir.exists():
+    def __init__(self, contracts_dir: StrPath, cache_dir: Optional[StrPath] = None):
+        # Plain strings from here on; the walk and workers never need a Path
+        self.contracts_dir = os.fspath(contracts_dir)
+        if not os.path.exists(self.contracts_dir):
             raise FileNotFoundError(f"Invalid contracts dir: {contracts_dir}")
-        self.contracts_dir = str(contracts_dir)
+        self.cache_dir = None if cache_dir is None else os.fspath(cache_dir)
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
 
     def parse_contracts(self) -> List[Contract]:
         """Parse all Vyper contracts in the directory."""
-        contracts = []
-        for root, _, files in os.walk(self.contracts_dir):
-            for file in files:
-                if file.endswith(".vy"):
-                    file_path = os.path.join(root, file)
-                    contract = self._parse_contract(file_path)
-                    contracts.append(contract)
+        contract_files = list(_iter_contract_files(self.contracts_dir))
+        max_workers = min(len(contract_files), _available_cpus())
+        if max_workers <= 1 or len(contract_files) <= MIN_PARALLEL_CONTRACTS:
+            contracts = [self._parse_contract(file) for file in contract_files]
+        else:
+            # Batch paths so each worker round-trip carries several contracts
+            chunksize = max(
+                1, min(MAX_PARSE_CHUNKSIZE, len(contract_files) // (max_workers * 4))
+            )
+            # Parsing is pure-python CPU work, so spread the files across processes
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                contracts = list(
+                    executor.map(
+                        self._parse_contract, contract_files, chunksize=chunksize
+                    )
+                )
+
+        if self.cache_dir is not None:
+            _prune_cache(self.cache_dir)
         return contracts
 
-    def _parse_contract(self, file_path: str) -> Contract:
+    def _parse_contract(self, contract_file: "_ContractFile") -> Contract:
         """Parse a single Vyper contract file."""
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        name = os.path.basename(file_path).replace(".vy", "")
-        rel_path = os.path.relpath(file_path, self.contracts_dir)
-
-        # Extract contract docstring
-        docstring = self._extract_contract_docstring(content)
-
-        # Extract structs
-        structs = self._extract_structs(content)
+        file_path, rel_path, name = contract_file
+
+        stat = os.stat(file_path)
+        contract = None
+        if self.cache_dir is not None:
+            # Unchanged files are found by their stat alone, without reading the source
+            stat_key = _stat_cache_key(file_path, stat)
+            cached = _read_cache(os.path.join(self.cache_dir, f"{stat_key}.json"))
+            if cached is not None:
+                # The same file is reached through a different relative path when
+                # parsing from another root, so restore this file's identity
+                contract = replace(cached, name=name, path=rel_path)
+
+        if contract is None:
+            # mmap can't map an empty file, and there's nothing to read anyway
+            if stat.st_size == 0:
+                contract = self._parse_source(name, rel_path, b"")
+            else:
+                with open(file_path, "rb", buffering=0) as f:
+                    # Hash and scan the mapped pages directly instead of copying them
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                        contract = self._parse_source(name, rel_path, source)
+
+            if self.cache_dir is not None:
+                # Keyed again, since a failed vyper import switches to the regex
+                # backend while parsing
+                stat_key = _stat_cache_key(file_path, stat)
+                _write_cache(os.path.join(self.cache_dir, f"{stat_key}.json"), contract)
+
+        # Validation only produces warnings, so optimized (-O) runs skip it entirely.
+        # Cached contracts are validated too, so warm rebuilds warn like cold ones
+        if __debug__:
+            _validate_types(contract)
+        return contract
+
+    def _parse_source(self, name: str, rel_path: str, source: Source) -> Contract:
+        """Parse a contract's source bytes, going through the cache if enabled."""
+        if self.cache_dir is None:
+            return self._parse_content(name, rel_path, source)
+
+        use_ast = use_vyper_ast
+        cache_path = os.path.join(self.cache_dir, f"{_cache_key(source)}.json")
+        contract = _read_cache(cache_path)
+        if contract is None:
+            contract = self._parse_content(name, rel_path, source)
+            if use_vyper_ast != use_ast:
+                # vyper failed to import, so the regex backend parsed this instead
+                cache_path = os.path.join(self.cache_dir, f"{_cache_key(source)}.json")
+            _write_cache(cache_path, contract)
+            return contract
+
+        # Identical sources share an entry, so restore this file's identity
+        return replace(contract, name=name, path=rel_path)
+
+    def _parse_content(self, name: str, rel_path: str, source: Source) -> Contract:
+        """Parse the source code of a single Vyper contract."""
+        contract = None
+        vyper = _import_vyper() if use_vyper_ast else None
+        if vyper is not None:
+            vy_ast, vyper_exception = vyper
+            try:
+                module = vy_ast.parse_to_ast(
+                    VERSION_PRAGMA_PATTERN.sub(_blank_pragma, str(source, "utf-8"))
+                )
+            except vyper_exception as e:
+                logger.warning("Falling back to regex parsing for %s: %s", rel_path, e)
+            else:
+                contract = self._contract_from_ast(vy_ast, name, rel_path, module)
 
-        # Extract functions
-        functions = self._extract_functions(content)
+        if contract is None:
+            contract = self._contract_from_source(name, rel_path, source)
+        return contract
 
+    @staticmethod
+    def _contract_from_ast(vy_ast: Any, name: str, path: str, module: Any) -> Contract:
+        """Build a contract from the module-level nodes of a Vyper AST."""
+        structs = []
+        external_functions = []
+        internal_functions = []
+        for node in module.body:
+            if isinstance(node, vy_ast.StructDef):
+                fields = [
+                    Parameter(
+                        name=field.target.id, type=_ast_type(vy_ast, field.annotation)
+                    )
+                    for field in node.body
+                ]
+                structs.append(Struct(name=node.name, fields=fields))
+            elif isinstance(node, vy_ast.FunctionDef):
+                decorators = {
+                    d.id for d in node.decorator_list if isinstance(d, vy_ast.Name)
+                }
+                # The constructor isn't part of the contract's callable interface
+                if "deploy" in decorators:
+                    continue
+                params = [
+                    Parameter(name=arg.arg, type=_ast_type(vy_ast, arg.annotation))
+                    for arg in node.args.args
+                ]
+                doc_node = node.get("doc_string")
+                function = Function(
+                    name=node.name,
+                    params=params,
+                    return_type=node.returns.node_source_code if node.returns else None,
+                    docstring=doc_node.value.strip() if doc_node else None,
+                )
+                if "external" in decorators:
+                    external_functions.append(function)
+                else:
+                    internal_functions.append(function)
+
+        # External functions are listed first; extend in place rather than copying both
+        external_functions.extend(internal_functions)
+        doc_node = module.get("doc_string")
         return Contract(
             name=name,
-            path=rel_path,
-            docstring=docstring,
+            path=path,
+            docstring=doc_node.value.strip() if doc_node else None,
             structs=structs,
-            functions=functions,
+            functions=external_functions,
         )
 
-    def _extract_contract_docstring(self, content: str) -> Optional[str]:
-        """Extract the contract's main docstring."""
-        match = re.search(r'^"""(.*?)"""', content, re.DOTALL | re.MULTILINE)
-        return match.group(1).strip() if match else None
-
-    def _extract_structs(self, content: str) -> List[Struct]:
-        """Extract all structs from the contract."""
-        structs = []
-        struct_pattern = r"struct\s+(\w+)\s*{([^}]*)}"
-
-        for match in re.finditer(struct_pattern, content):
-            name = match.group(1).strip()
-            fields_str = match.group(2).strip()
-            fields = self._parse_params(fields_str)
-            structs.append(Struct(name=name, fields=fields))
-
-        return structs
-
-    def _extract_functions(self, content: str) -> List[Function]:
-        """Extract all functions from the contract, with @external functions listed first."""
+    def _contract_from_source(self, name: str, path: str, source: Source) -> Contract:
+        """Build a contract by scanning its source for top-level definitions."""
+        docstring = None
+        definitions_start = 0
+        # Anchored at the top of the file, so this never scans past the docstring
+        docstring_match = CONTRACT_DOCSTRING_PATTERN.match(source)
+        if docstring_match is not None:
+            docstring = _decode_docstring(docstring_match.group("docstring_body"))
+            definitions_start = docstring_match.end()
+
+        structs: List[Struct] = []
         external_functions = []
         internal_functions = []
-        function_pattern = r'@(external|internal)\s+def\s+([^(]+)\(([^)]*)\)(\s*->\s*[^:]+)?:\s*("""[\s\S]*?""")?'
-
-        for match in re.finditer(function_pattern, content):
-            decorator = match.group(1).strip()
-            name = match.group(2).strip()
-            params_str = match.group(3).strip()
-            return_type = (
-                match.group(4).replace("->", "").strip() if match.group(4) else None
-            )
-            docstring = match.group(5)[3:-3].strip() if match.group(5) else None
-
-            params = self._parse_params(params_str)
-            function = Function(
-                name=name,
-                params=params,
-                return_type=return_type,
-                docstring=docstring,
+        # Interfaces and constant-only files have nothing for the full scan to find.
+        # find() rather than `in`, since mmap containment only tests single bytes
+        if (
+            source.find(b"def", definitions_start) == -1
+            and source.find(b"struct", definitions_start) == -1
+        ):
+            return Contract(
+                name=name, path=path, docstring=docstring, structs=[], functions=[]
             )
 
-            if decorator == "external":
-                external_functions.append(function)
+        # Bound once up front, since the loop body runs for every definition
+        parse_params = self._parse_params
+        append_struct = structs.append
+        for match in DEFINITION_PATTERN.finditer(source, definitions_start):
+            if match.lastgroup == "struct":
+                struct_name, struct_fields = match.group("struct_name", "struct_fields")
+                # \w in a bytes pattern only matches ASCII, so names can skip UTF-8
+                append_struct(
+                    Struct(
+                        name=struct_name.decode("ascii"),
+                        fields=parse_params(struct_fields.decode()),
+                    )
+                )
             else:
-                internal_functions.append(function)
-
-        # Combine external and internal functions, with external functions first
-        return external_functions + internal_functions
+                decorators, function_name, params, return_type, function_docstring = (
+                    match.group(
+                        "decorators",
+                        "function_name",
+                        "params",
+                        "return_type",
+                        "function_docstring",
+                    )
+                )
+                function = Function(
+                    name=function_name.decode("ascii"),
+                    params=parse_params(params.decode()),
+                    return_type=return_type.decode() if return_type else None,
+                    docstring=(
+                        _decode_docstring(function_docstring)
+                        if function_docstring is not None
+                        else None
+                    ),
+                )
+                decorator_names = DECORATOR_PATTERN.findall(decorators)
+                if b"deploy" in decorator_names:
+                    continue
+                if b"external" in decorator_names:
+                    external_functions.append(function)
+                else:
+                    internal_functions.append(function)
+
+        # External functions are listed first; extend in place rather than copying both
+        external_functions.extend(internal_functions)
+        return Contract(
+            name=name,
+            path=path,
+            docstring=docstring,
+            structs=structs,
+            functions=external_functions,
+        )
 
     @staticmethod
     def _parse_params(params_str: str) -> List[Parameter]:
@@ -211,12 +451,312 @@ class VyperParser:
         if not params_str:
             return []
 
+        # Only the tokens are shared between calls; every call gets fresh objects
         params = []
-        # Use regex to split by commas that are not within brackets
-        param_pattern = r"(\w+:\s*DynArray\[[^\]]+\]|\w+:\s*\w+)"
-        for param in re.finditer(param_pattern, params_str):
-            name, type_str = param.group().split(":")
-            type_str = type_str.strip()
-            typ = Tuple(type_str[1:-1].split(",")) if type_str[1] == "(" else type_str
-            params.append(Parameter(name=name.strip(), type=typ))
+        for name, kind, args in _tokenize_params(params_str):
+            type: Type
+            if kind == "dyn_array":
+                type = _make_dyn_array(*args)
+            elif kind == "tuple":
+                type = Tuple(list(args))
+            else:
+                type = args[0]
+            params.append(Parameter(name=name, type=type))
         return params
+
+
+class _ParamToken(NamedTuple):
+    """A parameter as matched by PARAM_PATTERN, before any objects are built."""
+
+    name: str
+    kind: str
+    args: Sequence[str]
+
+
+@lru_cache(maxsize=4096)
+def _tokenize_params(params_str: str) -> Sequence[_ParamToken]:
+    """Split a parameter list into tokens, memoized since signatures repeat a lot."""
+    if "#" in params_str:
+        params_str = COMMENT_PATTERN.sub("", params_str)
+    tokens = []
+    for match in PARAM_PATTERN.finditer(params_str):
+        kind = match.lastgroup
+        if kind == "dyn_array":
+            args: Sequence[str] = match.group("dyn_type", "dyn_length")
+        elif kind == "tuple":
+            args = tuple(match.group("tuple").split(","))
+        else:
+            args = (match.group("simple"),)
+        tokens.append(_ParamToken(match.group("name"), kind, args))  # type: ignore [arg-type]
+    return tuple(tokens)
+
+
+def _validate_types(contract: Contract) -> None:
+    """Warn once for each type used by a contract that isn't a valid Vyper type."""
+    used: Set[str] = set()
+    for struct in contract.structs:
+        for field in struct.fields:
+            _collect_type_names(field.type, used)
+    for function in contract.functions:
+        for param in function.params:
+            _collect_type_names(param.type, used)
+        if function.return_type is not None:
+            _collect_type_names(function.return_type, used)
+
+    for type_name in sorted(used - VALID_VYPER_TYPES):
+        logger.warning("%s in %s is not a valid Vyper type", type_name, contract.path)
+
+
+def _collect_type_names(type: Type, type_names: Set[str]) -> None:
+    """Add the base type names referenced by `type` to `type_names`."""
+    # Return types keep their size, e.g. Bytes[32], which isn't part of the type name
+    if isinstance(type, Tuple):
+        type_names.update(type_str.partition("[")[0] for type_str in type.types)
+    elif isinstance(type, DynArray):
+        type_names.add(type.type)
+    else:
+        type_names.add(type.partition("[")[0])
+
+
+def _decode_docstring(docstring: bytes) -> str:
+    """Decode a docstring read from the raw source, with universal newlines."""
+    # The source is read as bytes, so CRLF sources keep their \r until here
+    return docstring.decode().replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _blank_pragma(match: "re.Match[str]") -> str:
+    """Blank out a version pragma's keyword, keeping the line's length."""
+    return match.group(1) + "_" * len(match.group(2))
+
+
+def _ast_type(vy_ast: Any, annotation: Any) -> str:
+    """Return the type name documented for a Vyper AST annotation."""
+    if (
+        isinstance(annotation, vy_ast.Subscript)
+        and isinstance(annotation.value, vy_ast.Name)
+        and annotation.value.id in SIZED_TYPES
+    ):
+        return annotation.value.id  # type: ignore [no-any-return]
+    return annotation.node_source_code  # type: ignore [no-any-return]
+
+
+class _Vyper(NamedTuple):
+    ast: Any
+    exception: Any
+
+
+@lru_cache(maxsize=None)
+def _import_vyper() -> Optional[_Vyper]:
+    """Import vyper's AST module and base exception, or None if vyper is broken."""
+    global use_vyper_ast
+    try:
+        from vyper import ast as vy_ast
+        from vyper.exceptions import VyperException
+    except ImportError as e:
+        # e.g. a missing dependency or an unsupported Python; the regex backend
+        # still works, and cache keys must now say that's what ran
+        logger.warning("Falling back to regex parsing, vyper failed to import: %s", e)
+        use_vyper_ast = False
+        return None
+    return _Vyper(vy_ast, VyperException)
+
+
+@lru_cache(maxsize=None)
+def _cache_salt(use_ast: bool) -> bytes:
+    """Identify everything besides the source that decides what a parse returns."""
+    # The AST and regex backends don't produce identical contracts
+    if not use_ast:
+        return f"{CACHE_VERSION}:regex".encode()
+    try:
+        # Read from the installed metadata, so vyper itself isn't imported
+        from importlib.metadata import version
+
+        vyper_version = version("vyper")
+    except ImportError:
+        vyper_version = "unknown"
+    return f"{CACHE_VERSION}:ast:{vyper_version}".encode()
+
+
+def _cache_key(data: Source) -> str:
+    """Return the cache key for a contract's source bytes."""
+    key = hashlib.blake2b(digest_size=16)
+    key.update(_cache_salt(use_vyper_ast))
+    key.update(data)
+    return key.hexdigest()
+
+
+def _stat_cache_key(file_path: str, stat: os.stat_result) -> str:
+    """Return the cache key for a contract file's path and stat."""
+    key = hashlib.blake2b(digest_size=16)
+    key.update(_cache_salt(use_vyper_ast))
+    key.update(os.path.abspath(file_path).encode())
+    key.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return key.hexdigest()
+
+
+def _read_cache(cache_path: str) -> Optional[Contract]:
+    """Load a parsed contract from the cache, if present."""
+    try:
+        with open(cache_path, "rb") as f:
+            contract = _contract_from_json(json.load(f))
+    except Exception:
+        # Cache keys are predictable and the cache may sit in the repo being
+        # documented, so anything that doesn't decode to a contract is just a miss
+        return None
+    try:
+        # Entries that keep getting read survive _prune_cache
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return contract
+
+
+def _write_cache(cache_path: str, contract: Contract) -> None:
+    """Atomically write a parsed contract to the cache."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(_contract_to_json(contract), f, separators=(",", ":"))
+    os.replace(tmp_path, cache_path)
+
+
+# The cache is JSON rather than pickle so loading an entry can never run code
+
+
+def _contract_to_json(contract: Contract) -> Any:
+    """Encode a contract as plain JSON data."""
+    return {
+        "docstring": contract.docstring,
+        "structs": [
+            [struct.name, [_param_to_json(field) for field in struct.fields]]
+            for struct in contract.structs
+        ],
+        "functions": [
+            [
+                function.name,
+                [_param_to_json(param) for param in function.params],
+                (
+                    None
+                    if function.return_type is None
+                    else _type_to_json(function.return_type)
+                ),
+                function.docstring,
+            ]
+            for function in contract.functions
+        ],
+    }
+
+
+def _param_to_json(param: Parameter) -> Any:
+    return [param.name, _type_to_json(param.type)]
+
+
+def _type_to_json(type: Type) -> Any:
+    if isinstance(type, Tuple):
+        return {"tuple": type.types}
+    if isinstance(type, DynArray):
+        max_length = type.max_length
+        if isinstance(max_length, Constant):
+            return {"dyn_array": type.type, "constant": max_length.name}
+        return {"dyn_array": type.type, "max_length": max_length}
+    return type
+
+
+def _contract_from_json(data: Any) -> Contract:
+    """Decode a contract encoded by _contract_to_json, raising if it's malformed."""
+    # name and path are restored by the caller from the file being parsed
+    return Contract(
+        name="",
+        path="",
+        docstring=_optional_str(data["docstring"]),
+        structs=[
+            Struct(name=_str(name), fields=[_param_from_json(f) for f in fields])
+            for name, fields in data["structs"]
+        ],
+        functions=[
+            Function(
+                name=_str(name),
+                params=[_param_from_json(p) for p in params],
+                return_type=(
+                    None if return_type is None else _type_from_json(return_type)
+                ),
+                docstring=_optional_str(docstring),
+            )
+            for name, params, return_type, docstring in data["functions"]
+        ],
+    )
+
+
+def _param_from_json(data: Any) -> Parameter:
+    name, type = data
+    return Parameter(name=_str(name), type=_type_from_json(type))
+
+
+def _type_from_json(data: Any) -> Type:
+    if type(data) is str:
+        return intern(data)
+    if "tuple" in data:
+        return Tuple([_str(type_str) for type_str in data["tuple"]])
+    element_type = intern(_str(data["dyn_array"]))
+    if "constant" in data:
+        constant = Constant(name=_str(data["constant"]), type=None, value=None)  # type: ignore [arg-type]
+        return DynArray(element_type, constant)
+    max_length = data["max_length"]
+    if type(max_length) is not int:
+        raise TypeError(f"bad DynArray length: {max_length!r}")
+    return DynArray(element_type, max_length)
+
+
+def _str(value: Any) -> str:
+    if type(value) is not str:
+        raise TypeError(f"expected a str, got {value!r}")
+    return value
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return None if value is None else _str(value)
+
+
+def _prune_cache(cache_dir: str) -> None:
+    """Remove cache entries that haven't been read for CACHE_MAX_AGE."""
+    cutoff = time.time() - CACHE_MAX_AGE
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                # Another build may have pruned or replaced it already
+                pass
+
+
+class _ContractFile(NamedTuple):
+    """A contract file found below the contracts dir."""
+
+    path: str
+    rel_path: str
+    name: str
+
+
+def _iter_contract_files(path: str, rel_prefix: str = "") -> Iterator[_ContractFile]:
+    """Recursively yield all `.vy` files below `path`."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_contract_files(
+                    entry.path, f"{rel_prefix}{entry.name}{os.sep}"
+                )
+            # Unlike is_dir above, is_file follows symlinks so symlinked
+            # contracts are documented; those entries cost a stat here
+            elif entry.name.endswith(".vy") and entry.is_file():
+                # Built from the walk itself, no basename/relpath work per file
+                yield _ContractFile(
+                    entry.path, f"{rel_prefix}{entry.name}", entry.name[:-3]
+                )
+
+
+def _available_cpus() -> int:
+    """Return the number of CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        # respects cgroup cpusets and taskset pinning
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -2,7 +2,6 @@
 
 import http.server
 import os
-import socketserver
 import webbrowser
 from pathlib import Path
 from typing import NoReturn
@@ -11,18 +10,20 @@ from typing import NoReturn
 def serve_docs(build_dir: Path, port: int = 8000) -> NoReturn:  # type: ignore [misc]
     """Serve the documentation on a local development server."""
 
-    html_dir = build_dir / "html"
+    html_dir = os.path.join(build_dir, "html")
 
-    if not html_dir.exists():
+    # chdir resolves the path anyway, so let it double as the existence check
+    try:
+        os.chdir(html_dir)
+    except (FileNotFoundError, NotADirectoryError):
         raise FileNotFoundError(
             "Documentation not found. Run 'sphinx-autodoc-vyper' first to generate the documentation."
-        )
-
-    os.chdir(html_dir)
+        ) from None
 
     handler = http.server.SimpleHTTPRequestHandler
 
-    with socketserver.TCPServer(("", port), handler) as httpd:
+    # Browsers fetch page assets concurrently, so don't serve them one at a time
+    with http.server.ThreadingHTTPServer(("", port), handler) as httpd:
         url = f"http://localhost:{port}"
         print(f"Serving documentation at {url}")
         webbrowser.open(url)
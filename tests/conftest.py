@@ -1,11 +1,14 @@
 """Pytest configuration and fixtures."""
 
 from pathlib import Path
+from typing import Dict, List
 
 import pytest
 
+from sphinx_autodoc_vyper.parser import Contract, VyperParser
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def sample_contract() -> str:
     """Sample Vyper contract content."""
     return '''"""
@@ -45,7 +48,27 @@ def balance_of(account: address) -> uint256:
 @pytest.fixture
 def contracts_dir(tmp_path: Path, sample_contract: str) -> Path:
     """Create a temporary directory with sample contracts."""
-    contracts = tmp_path / "contracts"
+    return _write_contracts(tmp_path, sample_contract)
+
+
+@pytest.fixture(scope="session")
+def parsed_contracts(
+    tmp_path_factory: pytest.TempPathFactory, sample_contract: str
+) -> List[Contract]:
+    """Sample contracts, parsed once and shared read-only between tests."""
+    contracts = _write_contracts(tmp_path_factory.mktemp("parsed"), sample_contract)
+    return VyperParser(contracts).parse_contracts()
+
+
+@pytest.fixture(scope="session")
+def contracts_by_name(parsed_contracts: List[Contract]) -> Dict[str, Contract]:
+    """The parsed sample contracts, keyed by contract name."""
+    return {c.name: c for c in parsed_contracts}
+
+
+def _write_contracts(root: Path, sample_contract: str) -> Path:
+    """Write the sample contract, plus a nested copy, under root."""
+    contracts = root / "contracts"
     contracts.mkdir()
 
     # Create main contract
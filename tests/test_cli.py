@@ -1,6 +1,7 @@
 """Tests for the command-line interface."""
 
 from pathlib import Path
+from typing import List
 
 import pytest
 
@@ -49,3 +50,52 @@ def test_cli_invalid_contracts_dir(tmp_path: Path, monkeypatch, capsys) -> None:
         cli.main()
 
     assert "Invalid contracts dir" in str(e)
+
+
+def test_cli_build_failure(
+    contracts_dir: Path, output_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test CLI options reach the build and a failed build sets the exit code."""
+    argvs = []
+
+    def failing_build_main(argv: List[str]) -> int:
+        argvs.append(argv)
+        return 2
+
+    monkeypatch.setattr(cli, "build_main", failing_build_main)
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "sphinx-autodoc-vyper",
+            str(contracts_dir),
+            "--output",
+            str(output_dir),
+            "--jobs",
+            "4",
+            "--no-cache",
+        ],
+    )
+
+    with pytest.raises(SystemExit) as e:
+        cli.main()
+
+    assert e.value.code == 2
+    assert len(argvs) == 1
+    jobs_index = argvs[0].index("-j")
+    assert argvs[0][jobs_index + 1] == "4"
+    assert not (output_dir / "docs" / ".cache").exists()
+
+
+def test_cli_uses_parse_cache(
+    contracts_dir: Path, output_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test parsed contracts are cached under the output dir by default."""
+    monkeypatch.setattr(cli, "build_main", lambda argv: 0)
+    monkeypatch.setattr(
+        "sys.argv",
+        ["sphinx-autodoc-vyper", str(contracts_dir), "--output", str(output_dir)],
+    )
+
+    cli.main()
+
+    assert list((output_dir / "docs" / ".cache").glob("*.json"))
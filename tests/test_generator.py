@@ -3,7 +3,7 @@
 from pathlib import Path
 
 from sphinx_autodoc_vyper.generator import SphinxGenerator
-from sphinx_autodoc_vyper.parser import VyperParser
+from sphinx_autodoc_vyper.parser import Contract, Parameter, Struct, VyperParser
 
 
 def test_sphinx_generation(contracts_dir: Path, output_dir: Path) -> None:
@@ -73,3 +73,69 @@ def test_contract_rst_generation(contracts_dir: Path, output_dir: Path) -> None:
     # Check docstrings
     assert "Transfer tokens to a specified address" in content
     assert "Get the token balance of an account" in content
+
+
+def test_struct_rst_generation(output_dir: Path) -> None:
+    """Test RST generation for contract structs."""
+    struct = Struct(
+        name="Point",
+        fields=[Parameter(name="x", type="int128"), Parameter(name="y", type="int128")],
+    )
+    contract = Contract(
+        name="geometry",
+        path="geometry.vy",
+        docstring=None,
+        structs=[struct],
+        functions=[],
+    )
+
+    SphinxGenerator(str(output_dir)).generate([contract])
+
+    content = (output_dir / "docs" / "geometry.rst").read_text()
+    assert "Structs" in content
+    assert ".. py:class:: Point" in content
+    assert ".. py:attribute:: Point.x" in content
+    assert ".. py:attribute:: Point.y" in content
+    assert "int128" in content
+
+
+def test_empty_contract_skipped(output_dir: Path) -> None:
+    """Test contracts with nothing to document are left out of the docs."""
+    empty = Contract(
+        name="empty", path="empty.vy", docstring=None, structs=[], functions=[]
+    )
+    documented = Contract(
+        name="documented",
+        path="documented.vy",
+        docstring="Has a docstring.",
+        structs=[],
+        functions=[],
+    )
+
+    SphinxGenerator(str(output_dir)).generate([empty, documented])
+
+    docs_dir = output_dir / "docs"
+    assert not (docs_dir / "empty.rst").exists()
+    assert (docs_dir / "documented.rst").exists()
+    index_content = (docs_dir / "index.rst").read_text()
+    assert "empty" not in index_content
+    assert "documented" in index_content
+
+
+def test_same_named_contracts(output_dir: Path) -> None:
+    """Test same-named contracts in different directories yield one clean page."""
+    contracts = [
+        Contract(
+            name="token",
+            path=f"{directory}/token.vy",
+            docstring=f"Token from {directory}.",
+            structs=[],
+            functions=[],
+        )
+        for directory in ("a", "b")
+    ]
+
+    SphinxGenerator(str(output_dir)).generate(contracts)
+
+    content = (output_dir / "docs" / "token.rst").read_text()
+    assert content == "token\n=====\n\nToken from b.\n\n"
@@ -1,25 +1,35 @@
 """Tests for the Vyper contract parser."""
 
+import os
+import pickle
+import sys
+import time
 from pathlib import Path
+from typing import Any, Dict, List
 
-from sphinx_autodoc_vyper.parser import Contract, Function, Parameter, VyperParser
+import pytest
 
+from sphinx_autodoc_vyper import parser
+from sphinx_autodoc_vyper.parser import (
+    Constant,
+    Contract,
+    DynArray,
+    Function,
+    Parameter,
+    Tuple,
+    VyperParser,
+)
 
-def test_parse_contracts(contracts_dir: Path) -> None:
-    """Test parsing multiple contracts."""
-    parser = VyperParser(contracts_dir)
-    contracts = parser.parse_contracts()
 
-    assert len(contracts) == 2
-    assert any(c.name == "token" for c in contracts)
-    assert any(c.name == "nested_token" for c in contracts)
+def test_parse_contracts(parsed_contracts: List[Contract]) -> None:
+    """Test parsing multiple contracts."""
+    assert len(parsed_contracts) == 2
+    assert {c.name for c in parsed_contracts} == {"token", "nested_token"}
 
 
-def test_contract_parsing(contracts_dir: Path) -> None:
+def test_contract_parsing(contracts_by_name: Dict[str, Contract]) -> None:
     """Test detailed contract parsing."""
-    parser = VyperParser(contracts_dir)
-    contracts = parser.parse_contracts()
-    contract = next(c for c in contracts if c.name == "token")
+    contract = contracts_by_name["token"]
 
     # Test contract properties
     assert isinstance(contract, Contract)
@@ -28,8 +38,9 @@ def test_contract_parsing(contracts_dir: Path) -> None:
 
     # Test functions
     assert len(contract.functions) == 2
-    transfer_func = next(f for f in contract.functions if f.name == "transfer")
-    balance_func = next(f for f in contract.functions if f.name == "balance_of")
+    functions = {f.name: f for f in contract.functions}
+    transfer_func = functions["transfer"]
+    balance_func = functions["balance_of"]
 
     # Test transfer function
     assert isinstance(transfer_func, Function)
@@ -46,12 +57,10 @@ def test_contract_parsing(contracts_dir: Path) -> None:
     assert "Get the token balance" in balance_func.docstring
 
 
-def test_parameter_parsing(contracts_dir: Path) -> None:
+def test_parameter_parsing(contracts_by_name: Dict[str, Contract]) -> None:
     """Test function parameter parsing."""
-    parser = VyperParser(contracts_dir)
-    contracts = parser.parse_contracts()
-    contract = next(c for c in contracts if c.name == "token")
-    transfer_func = next(f for f in contract.functions if f.name == "transfer")
+    functions = {f.name: f for f in contracts_by_name["token"].functions}
+    transfer_func = functions["transfer"]
 
     # Test parameters
     assert len(transfer_func.params) == 2
@@ -82,3 +91,502 @@ def test_empty_contract(tmp_path: Path) -> None:
     assert contracts[0].name == "empty"
     assert contracts[0].docstring is None
     assert len(contracts[0].functions) == 0
+
+
+@pytest.mark.parametrize(
+    "file_count, chunksize", [(parser.MIN_PARALLEL_CONTRACTS + 1, 1), (80, 5), (400, 8)]
+)
+def test_parallel_parsing_matches_serial(
+    tmp_path: Path,
+    sample_contract: str,
+    monkeypatch: pytest.MonkeyPatch,
+    file_count: int,
+    chunksize: int,
+) -> None:
+    """Test the process pool parses the same contracts, in order, as a serial run."""
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    for i in range(file_count):
+        (contracts_dir / f"token_{i}.vy").write_text(sample_contract)
+
+    monkeypatch.setattr(parser, "_available_cpus", lambda: 1)
+    serial = VyperParser(contracts_dir).parse_contracts()
+
+    chunksizes = []
+
+    class RecordingExecutor(parser.ProcessPoolExecutor):
+        def map(self, *args: Any, **kwargs: Any) -> Any:
+            chunksizes.append(kwargs["chunksize"])
+            return super().map(*args, **kwargs)
+
+    monkeypatch.setattr(parser, "_available_cpus", lambda: 4)
+    monkeypatch.setattr(parser, "ProcessPoolExecutor", RecordingExecutor)
+    parallel = VyperParser(contracts_dir).parse_contracts()
+
+    assert chunksizes == [chunksize]
+    assert len(parallel) == file_count
+    assert parallel == serial
+
+
+def test_parser_accepts_str_path(contracts_dir: Path) -> None:
+    """Test the parser takes a plain string path as well as a Path."""
+    contracts = VyperParser(str(contracts_dir)).parse_contracts()
+    assert contracts == VyperParser(contracts_dir).parse_contracts()
+
+
+def test_ast_matches_regex_parsing(
+    contracts_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the Vyper AST backend produces the same contracts as the regex fallback."""
+    pytest.importorskip("vyper")
+    ast_contracts = VyperParser(contracts_dir).parse_contracts()
+
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    regex_contracts = VyperParser(contracts_dir).parse_contracts()
+
+    assert ast_contracts == regex_contracts
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_ast_matches_regex_parsing_full_contract(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+    newline: str,
+) -> None:
+    """Test both backends agree on structs, sized types, pragmas and visibility."""
+    pytest.importorskip("vyper")
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    source = '''# @version 0.3.10
+"""
+A vault.
+"""
+
+interface Token:
+    def transfer(to: address, amount: uint256) -> bool: nonpayable
+
+struct Deposit:
+    owner: address
+    # note: not a field
+    memo: Bytes[32]
+
+@deploy
+def __init__():
+    pass
+
+@external
+@view
+def name(label: String[10]) -> Bytes[32]:
+    """Return the vault name."""
+    return b""
+
+def _helper(amount: uint256) -> bool:
+    """
+    Undecorated,
+    so internal.
+    """
+    return True
+'''
+    (contracts_dir / "vault.vy").write_bytes(source.replace("\n", newline).encode())
+
+    ast_contracts = VyperParser(contracts_dir).parse_contracts()
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    regex_contracts = VyperParser(contracts_dir).parse_contracts()
+
+    assert ast_contracts == regex_contracts
+    contract = ast_contracts[0]
+    assert contract.docstring == "A vault."
+    assert [f.name for f in contract.structs[0].fields] == ["owner", "memo"]
+    assert contract.structs[0].fields[1].type == "Bytes"
+    assert [f.name for f in contract.functions] == ["name", "_helper"]
+    assert contract.functions[0].params[0].type == "String"
+    # No fallback for the pinned version, and sized types aren't invalid
+    assert caplog.records == []
+
+
+def test_ast_rejected_source_falls_back_to_regex(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test sources vyper can't parse are still documented by the regex backend."""
+    pytest.importorskip("vyper")
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "broken.vy").write_text('''"""Half-written."""
+
+@external
+def f(a: uint256) -> bool:
+    """Not finished."""
+    return a +
+''')
+
+    contract = VyperParser(contracts_dir).parse_contracts()[0]
+    warnings = [r.getMessage() for r in caplog.records]
+
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    assert [contract] == VyperParser(contracts_dir).parse_contracts()
+    assert contract.docstring == "Half-written."
+    assert contract.functions[0].docstring == "Not finished."
+    assert len(warnings) == 1
+    assert warnings[0].startswith("Falling back to regex parsing for broken.vy: ")
+
+
+def test_ast_stacked_decorators(tmp_path: Path) -> None:
+    """Test functions with multiple decorators are found by the Vyper AST backend."""
+    pytest.importorskip("vyper")
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "view.vy").write_text('''@external
+@view
+def get(a: DynArray[uint256, 5]) -> (uint256, bool):
+    """Get something."""
+    return 1, True
+''')
+
+    contract = VyperParser(contracts_dir).parse_contracts()[0]
+
+    assert len(contract.functions) == 1
+    func = contract.functions[0]
+    assert func.name == "get"
+    assert func.docstring == "Get something."
+    assert func.params[0].type == DynArray("uint256", 5)
+    assert func.return_type == Tuple(["uint256", "bool"])
+
+
+def test_broken_vyper_falls_back_to_regex(
+    contracts_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test a vyper that fails to import leaves parsing to the regex backend."""
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    regex_contracts = VyperParser(contracts_dir).parse_contracts()
+
+    # A None entry makes `import vyper` raise ImportError, as a broken install would
+    monkeypatch.setitem(sys.modules, "vyper", None)
+    monkeypatch.setattr(parser, "use_vyper_ast", True)
+    parser._import_vyper.cache_clear()
+    cache_dir = tmp_path / "cache"
+    try:
+        contracts = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+    finally:
+        parser._import_vyper.cache_clear()
+
+    assert contracts == regex_contracts
+    warnings = [r.getMessage() for r in caplog.records]
+    assert len(warnings) == 1
+    assert "vyper failed to import" in warnings[0]
+
+    # The results were cached as regex parses, so a regex run finds them all
+    entries = set(cache_dir.glob("*.json"))
+    VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+    assert set(cache_dir.glob("*.json")) == entries
+
+
+def test_parse_cache(contracts_dir: Path, tmp_path: Path) -> None:
+    """Test parsed contracts are cached and reused by stat and content hash."""
+    cache_dir = tmp_path / "cache"
+    contracts = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    # One entry per file stat, plus one for the source token.vy and
+    # nested_token.vy share
+    assert len(list(cache_dir.glob("*.json"))) == 3
+
+    cached = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+    assert cached == contracts
+    assert {c.name for c in cached} == {"token", "nested_token"}
+
+    # Editing a file invalidates its stat entry
+    (contracts_dir / "token.vy").write_text('"""Edited."""\n')
+    edited = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+    token = next(c for c in edited if c.name == "token")
+    assert token.docstring == "Edited."
+    assert token.functions == []
+
+
+def test_parse_cache_from_another_root(contracts_dir: Path, tmp_path: Path) -> None:
+    """Test cached contracts take their path from the directory being parsed."""
+    cache_dir = tmp_path / "cache"
+    VyperParser(contracts_dir / "nested", cache_dir=cache_dir).parse_contracts()
+
+    contracts = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    nested = next(c for c in contracts if c.name == "nested_token")
+    assert nested.path == "nested/nested_token.vy"
+
+
+def test_parse_cache_bad_entries(contracts_dir: Path, tmp_path: Path) -> None:
+    """Test unloadable cache entries are treated as cache misses."""
+    cache_dir = tmp_path / "cache"
+    contracts = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    # Truncated writes, entries from an older layout and JSON that isn't a contract
+    bad_entries = [b'{"docstring": "Tru', b'{"docstring": null}', b"[]", b'"token"']
+    for entry in cache_dir.glob("*.json"):
+        for bad_entry in bad_entries:
+            entry.write_bytes(bad_entry)
+            assert (
+                VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+                == contracts
+            )
+
+
+def test_parse_cache_never_unpickles(
+    contracts_dir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test cache entries planted in the cache dir can't run code when loaded."""
+    cache_dir = tmp_path / "cache"
+    contracts = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    marker = tmp_path / "pwned"
+    payload = pickle.dumps(_Touch(str(marker)))
+    for entry in cache_dir.glob("*.json"):
+        entry.write_bytes(payload)
+        entry.with_suffix(".pkl").write_bytes(payload)
+
+    assert (
+        VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts() == contracts
+    )
+    assert not marker.exists()
+
+
+class _Touch:
+    """Creates a file when unpickled."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __reduce__(self) -> Any:
+        return open, (self.path, "w")
+
+
+def test_parse_cache_round_trips_types(tmp_path: Path) -> None:
+    """Test every kind of type comes back from the cache unchanged."""
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "types.vy").write_text('''"""Types."""
+
+struct Point:
+    x: int128
+    tags: DynArray[uint256, MAX_TAGS]
+
+@external
+def get(a: DynArray[address, 5], b: (uint256, bool)) -> (uint256, bool):
+    """Get something."""
+    return 1, True
+
+def _none():
+    pass
+''')
+    cache_dir = tmp_path / "cache"
+    contracts = VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    # Once through the stat entries, and once through the content entries
+    assert (
+        VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts() == contracts
+    )
+    os.utime(contracts_dir / "types.vy", (0, 0))
+    assert (
+        VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts() == contracts
+    )
+
+
+def test_parse_cache_warns_when_warm(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test invalid types are still reported when contracts come from the cache."""
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "points.vy").write_text("""@external
+def first(a: Point) -> bool:
+    return True
+""")
+    cache_dir = tmp_path / "cache"
+    VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+    caplog.clear()
+
+    VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    warnings = [r.getMessage() for r in caplog.records]
+    assert warnings == ["Point in points.vy is not a valid Vyper type"]
+
+
+def test_parse_cache_prunes_stale_entries(contracts_dir: Path, tmp_path: Path) -> None:
+    """Test cache entries left unread for too long are removed."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    stale = cache_dir / "stale.json"
+    stale.write_bytes(b"")
+    expired = time.time() - parser.CACHE_MAX_AGE - 60
+    os.utime(stale, (expired, expired))
+
+    VyperParser(contracts_dir, cache_dir=cache_dir).parse_contracts()
+
+    assert not stale.exists()
+    assert len(list(cache_dir.glob("*.json"))) == 3
+
+
+def test_dynarray_parameter() -> None:
+    """Test DynArray parameter types are parsed into DynArray objects."""
+    assert Parameter(name="a", type="DynArray[uint256, 5]").type == DynArray(
+        "uint256", 5
+    )
+    assert Parameter(name="b", type="DynArray[address,MAX_OWNERS]").type == DynArray(
+        "address", Constant(name="MAX_OWNERS", type=None, value=None)  # type: ignore [arg-type]
+    )
+
+
+def test_tuple_parameter() -> None:
+    """Test tuple parameter types are parsed into Tuple objects."""
+    params = VyperParser._parse_params("a: (uint256, bool), b: address")
+    assert params == [
+        Parameter(name="a", type=Tuple(["uint256", "bool"])),
+        Parameter(name="b", type="address"),
+    ]
+
+
+def test_tuple_length() -> None:
+    """Test a Tuple's length is its number of member types."""
+    assert len(Tuple(["uint256", "bool", "address"])) == 3
+
+
+def test_invalid_type_warns_once(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test each unknown type is reported once per contract."""
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "points.vy").write_text("""@external
+def first(a: Point) -> Point:
+    return a
+
+@external
+def second(b: Point, c: uint256) -> bool:
+    return True
+""")
+
+    VyperParser(contracts_dir).parse_contracts()
+
+    warnings = [r.getMessage() for r in caplog.records]
+    assert warnings == ["Point in points.vy is not a valid Vyper type"]
+
+
+def test_regex_contract_docstring_after_pragma(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the regex fallback finds a contract docstring below leading comments."""
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "pragma.vy").write_text('''# @version 0.3.10
+
+"""
+Contract docstring.
+"""
+
+@external
+def f():
+    """Function docstring."""
+    pass
+''')
+
+    contract = VyperParser(contracts_dir).parse_contracts()[0]
+
+    assert contract.docstring == "Contract docstring."
+    assert contract.functions[0].docstring == "Function docstring."
+
+
+def test_regex_contract_crlf_docstrings(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the regex fallback reads CRLF docstrings with plain newlines."""
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "crlf.vy").write_bytes(b'''"""\r
+Contract docstring.\r
+Second line.\r
+"""\r
+\r
+@external\r
+def f():\r
+    """\r
+    Function docstring.\r
+    Second line.\r
+    """\r
+    pass\r
+''')
+
+    contract = VyperParser(contracts_dir).parse_contracts()[0]
+
+    assert contract.docstring == "Contract docstring.\nSecond line."
+    assert contract.functions[0].docstring == "Function docstring.\n    Second line."
+
+
+def test_regex_contract_comment_banner(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the regex fallback copes with long `#` banners above the code."""
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    banner = "#" * 80
+    (contracts_dir / "banner.vy").write_text(f"""# @version 0.3.10
+{banner}
+
+@external
+def f():
+    pass
+""")
+    (contracts_dir / "documented.vy").write_text(f'''# @version 0.3.10
+{banner}
+"""
+Contract docstring.
+"""
+''')
+
+    contracts = {c.name: c for c in VyperParser(contracts_dir).parse_contracts()}
+
+    assert contracts["banner"].docstring is None
+    assert [f.name for f in contracts["banner"].functions] == ["f"]
+    assert contracts["documented"].docstring == "Contract docstring."
+
+
+def test_regex_contract_without_definitions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the regex fallback on a contract with no structs or functions."""
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "constants.vy").write_text('''"""
+Shared constants.
+"""
+
+MAX_OWNERS: constant(uint256) = 10
+''')
+
+    contract = VyperParser(contracts_dir).parse_contracts()[0]
+
+    assert contract.docstring == "Shared constants."
+    assert contract.structs == []
+    assert contract.functions == []
+
+
+def test_parsing_does_not_compile_patterns(
+    contracts_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test parsing only uses the patterns compiled at import time."""
+    monkeypatch.setattr(parser, "use_vyper_ast", False)
+
+    def fail_compile(*args: object, **kwargs: object) -> None:
+        raise AssertionError("regex compiled while parsing")
+
+    # re.compile and the module-level helpers (re.search, re.finditer, ...) all
+    # go through re._compile, so this catches any pattern not compiled up front
+    monkeypatch.setattr(parser.re, "_compile", fail_compile)
+
+    contracts = VyperParser(contracts_dir).parse_contracts()
+
+    assert len(contracts) == 2
@@ -3,10 +3,10 @@
 import socket
 import threading
 import time
+from http.client import HTTPConnection
 from pathlib import Path
 
 import pytest
-import requests
 
 from sphinx_autodoc_vyper import cli, server
 
@@ -31,16 +31,18 @@ def test_server_start(tmp_path: Path) -> None:
     server_thread.start()
 
     # Wait for server to start
-    time.sleep(1)
+    _wait_for_port(port)
 
     # Test server response
+    conn = HTTPConnection("localhost", port, timeout=2)
     try:
-        response = requests.get(f"http://localhost:{port}")
-        assert response.status_code == 200
-        assert "Test" in response.text
+        conn.request("GET", "/")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert "Test" in response.read().decode()
     finally:
         # Cleanup (server will be stopped when thread is terminated)
-        pass
+        conn.close()
 
 
 def test_server_missing_docs(tmp_path: Path) -> None:
@@ -50,6 +52,14 @@ def test_server_missing_docs(tmp_path: Path) -> None:
         server.serve_docs(missing_path)
 
 
+def test_server_build_dir_is_file(tmp_path: Path) -> None:
+    """Test server behavior when the build path is not a directory."""
+    build_file = tmp_path / "_build"
+    build_file.write_text("")
+    with pytest.raises(FileNotFoundError):
+        server.serve_docs(build_file)
+
+
 def _get_free_port() -> int:
     """Get an available port number."""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -57,3 +67,14 @@ def _get_free_port() -> int:
         s.listen(1)
         port = s.getsockname()[1]
     return port  # type: ignore [no-any-return]
+
+
+def _wait_for_port(port: int, timeout: float = 5) -> None:
+    """Wait until something is accepting connections on the port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            if s.connect_ex(("localhost", port)) == 0:
+                return
+        time.sleep(0.01)
+    raise TimeoutError(f"Server did not start on port {port}")